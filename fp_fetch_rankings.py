@@ -4,7 +4,7 @@ Download FantasyPros season-long projections and convert to per-game for use as
 Outputs: fp_rankings_MMDDYYYY.csv   (e.g., fp_rankings_08142025.csv)
 
 Requirements:
-  pip install pandas requests lxml
+  pip install pandas requests lxml requests-cache
 
 Notes:
 - For RB/WR/TE we use HALF-PPR URLs you provided.
@@ -12,34 +12,95 @@ Notes:
 """
 
 import argparse
+import functools
 import io
+import logging
 import os
+import re
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
 
+import lxml.html
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from requests_cache import CachedSession
+except ImportError:
+    CachedSession = None
 
 
 URLS = [
     # (url, pos)
     ("https://www.fantasypros.com/nfl/projections/qb.php?week=draft", "QB"),
-    ("https://www.fantasypros.com/nfl/projections/rb.php?week=draft&scoring=HALF&week=draft", "RB"),
-    ("https://www.fantasypros.com/nfl/projections/wr.php?week=draft&scoring=HALF&week=draft", "WR"),
-    ("https://www.fantasypros.com/nfl/projections/te.php?week=draft&scoring=HALF&week=draft", "TE"),
+    ("https://www.fantasypros.com/nfl/projections/rb.php?week=draft&scoring=HALF", "RB"),
+    ("https://www.fantasypros.com/nfl/projections/wr.php?week=draft&scoring=HALF", "WR"),
+    ("https://www.fantasypros.com/nfl/projections/te.php?week=draft&scoring=HALF", "TE"),
 ]
 
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; projections-scraper/1.0; +https://example.com)",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    # Ask for compressed bodies; requests decompresses transparently and the
+    # streamed HTML path sets decode_content so lxml sees plain bytes.
+    "Accept-Encoding": "gzip, deflate",
 }
 
 
+def build_session(retries: int = 2, backoff: float = 1.5, cache: bool = False) -> requests.Session:
+    """
+    Build a Session that keeps connections to fantasypros.com alive across
+    the four position fetches and retries transient HTTP errors at the
+    urllib3 layer. With cache=True (and requests-cache installed), responses
+    are cached to a local SQLite file for an hour so repeat runs during
+    development skip the network entirely.
+    """
+    if cache and CachedSession is not None:
+        session = CachedSession(".fp_cache.sqlite", expire_after=3600, allowable_methods=("GET",))
+    else:
+        session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=4,
+        max_retries=Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared across all fetches so every request reuses the same keep-alive pool.
+SESSION = build_session()
+
+
+# Column-name lookups used on every downloaded table, built once at import.
+# Alias tuples are in priority order: exact names first, generic ones last.
+PLAYER_ALIASES = ("player", "name")
+TEAM_COLS = ("team", "tm")
+FPTS_PRIORITY = ("fpts", "fantasy pts", "fantasypts", "total fpts", "misc fpts", "points")
+
+# Trailing team abbreviation in "Lamar Jackson BAL"-style player strings.
+_TEAM_RE = re.compile(r"^(?P<name>.*?)\s+(?P<tm>[A-Z]{2,4})\s*$")
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=32)
 def add_or_update_query(url: str, **params):
-    """Return url with added/updated query parameters."""
+    """Return url with added/updated query parameters. Memoized so the four
+    fixed URLs are only parsed and re-encoded once per process."""
     parts = urlparse(url)
     q = dict(parse_qsl(parts.query, keep_blank_values=True))
     q.update(params)
@@ -47,23 +108,33 @@ def add_or_update_query(url: str, **params):
     return urlunparse((parts.scheme, parts.netloc, parts.path, parts.params, new_query, parts.fragment))
 
 
-def try_fetch_csv(url: str, timeout: int = 30):
+def try_fetch_csv(url: str, session: requests.Session = None, timeout: int = 30):
     """
     Try FantasyPros CSV export by appending csv=1.
     Return DataFrame if successful; else None.
     """
+    session = session or SESSION
     csv_url = add_or_update_query(url, csv="1")
-    resp = requests.get(csv_url, headers=HEADERS, timeout=timeout)
+    resp = session.get(csv_url, timeout=timeout)
     if resp.status_code != 200:
         return None
 
-    text = resp.text.strip()
-    # quick heuristic: must look like CSV with a header that includes "Player"
-    if "Player" not in text.splitlines()[0]:
+    body = resp.content.strip()
+    # quick heuristic: must look like CSV with a header that includes "Player".
+    # Only slice off the first line rather than splitting the whole body.
+    header_end = body.find(b"\n")
+    header = body[:header_end] if header_end != -1 else body[:200]
+    if b"Player" not in header:
         return None
 
     try:
-        df = pd.read_csv(io.StringIO(text))
+        # Arrow's multithreaded CSV reader beats the default C engine and
+        # builds columnar strings instead of per-cell Python objects.
+        try:
+            df = pd.read_csv(io.BytesIO(body), engine="pyarrow", dtype_backend="pyarrow")
+        except ImportError:
+            # pyarrow is optional; the default C engine still reads the bytes.
+            df = pd.read_csv(io.BytesIO(body))
         return df
     except Exception:
         return None
@@ -78,86 +149,92 @@ def clean_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def locate_projection_table(tables: list[pd.DataFrame]):
+def fetch_html_table(url: str, session: requests.Session = None, timeout: int = 30):
     """
-    Among dataframes read from HTML, pick the one that has a Player column and FPTS (seasonal total).
-    Accept common synonyms for fpts.
+    Fallback: pull the HTML and parse the projections table directly with lxml.
+    FantasyPros projection pages carry exactly one relevant table (id="data"),
+    so we XPath-select it instead of letting pandas.read_html parse every
+    table on the page. Return DataFrame if found; else None.
     """
-    fpts_aliases = {"fpts", "fantasy pts", "fantasypts", "points", "misc fpts"}
-    for t in tables:
-        df = clean_columns(t.copy())
-        cols = set(df.columns)
-        if "player" in cols and any(alias in cols for alias in fpts_aliases):
-            return df
-    return None
+    session = session or SESSION
+    # Stream the body straight into lxml so parsing starts while bytes are
+    # still arriving and we never hold a second decoded copy of the page.
+    with session.get(url, timeout=timeout, stream=True) as resp:
+        resp.raise_for_status()
+        resp.raw.decode_content = True
+        tree = lxml.html.parse(resp.raw).getroot()
+    tables = tree.xpath('//table[@id="data"]')
+    if not tables:
+        return None
+    table = tables[0]
+
+    # FP uses a grouped two-row header; the last <thead> row holds the real
+    # column names (mirrors the MultiIndex flattening in clean_columns).
+    header_rows = table.xpath(".//thead/tr")
+    headers = None
+    if header_rows:
+        headers = [" ".join(cell.text_content().split()) for cell in header_rows[-1].xpath("./th | ./td")]
+
+    data = []
+    for tr in table.xpath(".//tbody/tr"):
+        cells = [" ".join(cell.text_content().split()) for cell in tr.xpath("./td | ./th")]
+        if cells:
+            data.append(cells)
+    if not data:
+        return None
+    if headers is None:
+        headers, data = data[0], data[1:]
 
+    return pd.DataFrame(data, columns=headers)
 
-def fetch_html_table(url: str, timeout: int = 30):
+
+def _split_embedded_team(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Fallback: pull the HTML and parse tables with pandas.read_html.
-    Return DataFrame if we find a matching table; else None.
+    Split 'Lamar Jackson BAL'-style player strings into player + team.
+    One vectorized regex pass instead of a Python function per row.
     """
-    resp = requests.get(url, headers=HEADERS, timeout=timeout)
-    resp.raise_for_status()
-    try:
-        tables = pd.read_html(io.StringIO(resp.text), flavor="lxml")
-    except ValueError:
-        # no tables found
-        return None
-    return locate_projection_table(tables)
+    extracted = df["player"].astype(str).str.strip().str.extract(_TEAM_RE)
+    mask = extracted["tm"].notna()
+    df.loc[mask, "player"] = extracted.loc[mask, "name"]
+    df["team"] = extracted["tm"]
+    return df
 
 
-def extract_player_team_fpts(df: pd.DataFrame):
+def extract_player_team_fpts(df: pd.DataFrame, embedded_team: bool = True):
     """
     Keep only 'player','team','fpts' (season totals). Handle common header variants.
-    If team is embedded or missing, try to split/clean gracefully.
+    The CSV export already ships a separate Team column, so callers on that path
+    pass embedded_team=False and skip the regex split entirely.
     """
     df = clean_columns(df)
+    cols = set(df.columns)
 
-    # Player
-    if "player" not in df.columns:
-        # Some FP exports may use 'name'
-        if "name" in df.columns:
-            df["player"] = df["name"]
-        else:
-            raise ValueError("Could not find 'player' column in downloaded table.")
+    # Player - some FP exports may use 'name'
+    player_col = next((c for c in PLAYER_ALIASES if c in cols), None)
+    if player_col is None:
+        raise ValueError("Could not find 'player' column in downloaded table.")
+    if player_col != "player":
+        df["player"] = df[player_col]
 
     # Team - check if there's a separate team column first
-    team_col = None
-    for c in ("team", "tm"):
-        if c in df.columns:
-            team_col = c
-            break
-    
-    if team_col is None:
-        # Extract team from 'player' column if embedded like "Lamar Jackson BAL"
-        def extract_player_team(player_str):
-            parts = str(player_str).strip().split()
-            if len(parts) >= 2:
-                # Last part is likely the team abbreviation (usually 2-3 chars)
-                potential_team = parts[-1]
-                if len(potential_team) <= 4 and potential_team.isupper():
-                    return " ".join(parts[:-1]), potential_team
-            return player_str, pd.NA
-        
-        # Apply extraction
-        extracted = df["player"].apply(extract_player_team)
-        df["player"] = [x[0] for x in extracted]
-        df["team"] = [x[1] for x in extracted]
-    else:
+    team_col = next((c for c in TEAM_COLS if c in cols), None)
+
+    if team_col is not None:
         df["team"] = df[team_col]
+    elif embedded_team:
+        # Team may be embedded in the player string on the HTML path.
+        df = _split_embedded_team(df)
+    else:
+        df["team"] = pd.NA
 
     # FPTS (season total)
-    fpts_col = None
-    for c in ("fpts", "fantasy pts", "fantasypts", "points", "total fpts"):
-        if c in df.columns:
-            fpts_col = c
-            break
+    fpts_col = next((c for c in FPTS_PRIORITY if c in cols), None)
     if fpts_col is None:
         raise ValueError("Could not find 'FPTS' (season total) in downloaded table.")
 
-    out = df[["player", "team", fpts_col]].copy()
-    out.rename(columns={fpts_col: "fpts"}, inplace=True)
+    # Column selection + rename without a deep copy; pandas copy-on-write
+    # keeps the later in-place coercions from touching the source frame.
+    out = df.loc[:, ["player", "team", fpts_col]].rename(columns={fpts_col: "fpts"})
 
     # Coerce types
     out["player"] = out["player"].astype(str).str.strip()
@@ -169,70 +246,101 @@ def extract_player_team_fpts(df: pd.DataFrame):
     return out
 
 
-def fetch_position(url: str, pos_label: str, weeks: int = 17, retries: int = 2, backoff: float = 1.5):
+def fetch_position(url: str, pos_label: str, session: requests.Session = None):
     """
     Pull one position, prefer CSV endpoint, else HTML table.
-    Returns columns: player, team, proj_pts, pos
+    Transient HTTP errors (429/5xx, dropped connections) are retried with
+    backoff by the session's urllib3 Retry; parse errors fail fast instead
+    of sleeping and refetching the same bad page.
+    Returns (players, teams, fpts) numpy arrays; main() combines all
+    positions and does the per-game division in one vectorized pass.
     """
-    last_err = None
-    for attempt in range(retries + 1):
-        try:
-            # Try CSV export first
-            df = try_fetch_csv(url)
-            if df is None:
-                # Fallback to HTML table read
-                df = fetch_html_table(url)
-            if df is None or df.empty:
-                raise ValueError("No data table found.")
-
-            base = extract_player_team_fpts(df)
-            base["proj_pts"] = (base["fpts"] / float(weeks)).round(2)
-            base["pos"] = pos_label
-            return base[["player", "team", "proj_pts", "pos"]]
-        except Exception as e:
-            last_err = e
-            if attempt < retries:
-                time.sleep(backoff ** attempt)
-            else:
-                raise RuntimeError(f"Failed to fetch {pos_label} from {url}: {e}") from e
-    # Should not reach here
-    raise last_err
+    session = session or SESSION
+    try:
+        # Try CSV export first
+        df = try_fetch_csv(url, session=session)
+        from_csv = df is not None
+        if df is None:
+            # Fallback to HTML table read
+            df = fetch_html_table(url, session=session)
+        if df is None or df.empty:
+            raise ValueError("No data table found.")
+
+        base = extract_player_team_fpts(df, embedded_team=not from_csv)
+        return (
+            base["player"].to_numpy(),
+            base["team"].to_numpy(),
+            base["fpts"].to_numpy(dtype=float),
+        )
+    except Exception as e:
+        raise RuntimeError(f"Failed to fetch {pos_label} from {url}: {e}") from e
 
 
 def main():
     parser = argparse.ArgumentParser(description="Download FantasyPros season projections and make per-game rankings CSV.")
     parser.add_argument("--weeks", type=int, default=17, help="Games to divide season FPTS by (default: 17).")
     parser.add_argument("--out", type=str, default=None, help="Output CSV filename (default: fp_rankings_MMDDYYYY.csv).")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the local HTTP response cache and always hit the network.")
+    parser.add_argument("--quiet", action="store_true", help="Suppress progress output.")
     args = parser.parse_args()
 
+    logging.basicConfig(
+        level=logging.WARNING if args.quiet else logging.INFO,
+        format="[%(levelname)s] %(message)s",
+    )
+
+    session = build_session(cache=not args.no_cache)
+
     out_name = args.out
     if not out_name:
-        out_name = f"fp_rankings_{datetime.now().strftime('%m%d%Y')}.csv"
-    
-    # Ensure output goes to data/ folder
-    if not os.path.isabs(out_name):
-        data_dir = "data"
-        os.makedirs(data_dir, exist_ok=True)
-        out_name = os.path.join(data_dir, out_name)
-
-    frames = []
-    for url, pos in URLS:
-        print(f"[INFO] Fetching {pos} from {url} ...")
-        df_pos = fetch_position(url, pos_label=pos, weeks=args.weeks)
-        print(f"[INFO]  -> {len(df_pos)} rows")
-        frames.append(df_pos)
-
-    df_all = pd.concat(frames, ignore_index=True)
-
-    # Basic sanity filter: keep only expected positions
-    df_all = df_all[df_all["pos"].isin(["QB", "RB", "WR", "TE"])].copy()
-
-    # Final ordering and dtypes
-    df_all = df_all[["player", "team", "proj_pts", "pos"]]
-    df_all["proj_pts"] = pd.to_numeric(df_all["proj_pts"], errors="coerce")
-
-    df_all.to_csv(out_name, index=False)
-    print(f"[DONE] Wrote {len(df_all)} rows to {out_name}")
+        # Default into the data/ folder with today's date
+        out_name = os.path.join("data", f"fp_rankings_{datetime.now():%m%d%Y}.csv")
+    out_dir = os.path.dirname(out_name)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    # The four fetches are independent and network-bound; overlap them so
+    # wall time is ~max(latency) instead of the sum. The shared SESSION's
+    # keep-alive pool is thread-safe for this usage.
+    with ThreadPoolExecutor(max_workers=len(URLS)) as executor:
+        futures = []
+        for url, pos in URLS:
+            logger.info("Fetching %s from %s ...", pos, url)
+            futures.append(executor.submit(fetch_position, url, pos_label=pos, session=session))
+        results = []
+        for (url, pos), future in zip(URLS, futures):
+            players, teams, fpts = future.result()
+            logger.info(" -> %d %s rows", len(players), pos)
+            results.append((players, teams, fpts, pos))
+
+    # One concatenation, one vectorized division, one DataFrame allocation
+    # instead of per-position frames glued together at the end.
+    counts = [len(players) for players, _, _, _ in results]
+    df_all = pd.DataFrame({
+        "player": np.concatenate([r[0] for r in results]),
+        "team": np.concatenate([r[1] for r in results]),
+        "proj_pts": np.round(np.concatenate([r[2] for r in results]) / float(args.weeks), 2),
+        "pos": np.repeat([r[3] for r in results], counts),
+    })
+
+    # Compact dtypes: float32 is plenty for two-decimal projections, and
+    # team/pos are low-cardinality (~32 teams, 4 positions).
+    df_all["proj_pts"] = pd.to_numeric(df_all["proj_pts"], downcast="float")
+    df_all["team"] = df_all["team"].astype("category")
+    df_all["pos"] = df_all["pos"].astype("category")
+    try:
+        df_all["player"] = df_all["player"].astype("string[pyarrow]")
+    except ImportError:
+        df_all["player"] = df_all["player"].astype("string")
+
+    try:
+        # Arrow's CSV writer encodes in C; pandas' writer walks rows in Python.
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        pacsv.write_csv(pa.Table.from_pandas(df_all, preserve_index=False), out_name)
+    except ImportError:
+        df_all.to_csv(out_name, index=False)
+    logger.info("Wrote %d rows to %s", len(df_all), out_name)
 
 
 if __name__ == "__main__":